@@ -5,5 +5,14 @@ from .config import Config, Prefs, Subcommand
 from .error import Error
 from .job import Clip, Job, Video
 
-# Exported modules
-from . import gen
+def __getattr__(name):
+    "Import the heavier exported modules lazily (PEP 562)."
+
+    # The gen module drags in the YAML machinery, which subcommands like
+    # help never touch, so defer it until first attribute access
+    if name == "gen":
+        import importlib
+        module = importlib.import_module(".gen", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
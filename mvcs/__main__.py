@@ -11,28 +11,23 @@ import mvcs
 def handle_clip(config: mvcs.Config):
     "Handle the clip subcommand."
 
-    yaml = config.job_path
-
-    mvcs.gen.check_template(yaml, config.output_dir, config.video_dir)
-    print(config.video_dir)
-    print(config.video_ext)
-    # print(mvcs.gen.current_time())
+    mvcs.gen.check_template(config.job_path, config.output_dir, config.video_dir)
     latest = mvcs.gen.latest_video(config, mvcs.gen.current_time(), config.video_ext, config.video_dir)
-    video = mvcs.gen.add_video(
-        yaml,
-        latest,
-        0,
-        "Video"
-    )
-    mvcs.gen.trigger_clip(
-      config,
-      latest,
-      300,
-      30,
-      yaml,
-      latest,
-      "CLIP IT!",
-    )
+
+    # Load the job file once, record the video and clip in memory, and write
+    # the result back in a single pass
+    jobfile = mvcs.gen.JobFile.load(config.job_path)
+    jobfile.add_video(latest, 0, "Video")
+    mvcs.gen.trigger_clip(config, jobfile, latest, 300, 30, "CLIP IT!")
+    jobfile.flush()
+
+def handle_convert(config: mvcs.Config):
+    "Handle the convert subcommand."
+
+    # Pre-generate a JSON job file so later runs never pay for a YAML parse
+    dst = config.job_path.with_suffix(".json")
+    mvcs.job.convert_job_file(config.job_path, dst)
+    print(f"wrote: {dst}", file=sys.stderr)
 
 def handle_help(_config: mvcs.Config):
     "Handle the help subcommand."
@@ -51,12 +46,18 @@ def handle_help(_config: mvcs.Config):
             f"        Path to the input video directory (default: {prefs.video_dir})",
             "    -j, --job-path <PATH>",
             f"        Path to the clipping job YAML file (default: {prefs.job_path})",
+            "    --jobs <N>",
+            f"        Number of clips to write in parallel (default: {prefs.jobs})",
             "    -o, --output-dir <PATH>",
             f"        Path to the output clips directory (default: {prefs.output_dir})",
             "    -r, --filename-replace <OLD>=<NEW>",
             "        Add a mapping to replace strings in input/output filenames,",
             "        e.g. `--filename-replace ' =_'` to replace spaces with underscores;",
             "        pass an empty string to clear the current mappings",
+            "    --ffmpeg-threads <N>",
+            f"        Number of threads each ffmpeg process may use (default: {prefs.ffmpeg_threads})",
+            "    --force",
+            "        Rewrite output clips even when they already exist",
             "    --output-ext <EXTENSION>",
             f"        Output clip file extension (default: {prefs.output_ext})",
             "    --video-ext <EXTENSION>",
@@ -65,16 +66,18 @@ def handle_help(_config: mvcs.Config):
             f"        Input video filename format (default: {prefs.video_filename_format})",
             "",
             "SUBCOMMANDS:",
-            "    clip    Add a new clip to the job file",
-            "    help    Print usage information",
-            "    run     Run the job file to process videos and produce clips",
+            "    clip     Add a new clip to the job file",
+            "    convert  Convert the job file to the faster-loading JSON format",
+            "    help     Print usage information",
+            "    run      Run the job file to process videos and produce clips",
     ):
         print(line, file=sys.stderr)
 
 def handle_run(config: mvcs.Config):
     "Handle the run subcommand."
-    # Deserialize the YAML job playbook and run it
+    # Deserialize the YAML job playbook, check it up front, and run it
     job = mvcs.Job.from_yaml_file(config)
+    job.validate(config)
     job.run(config)
 
 def main(argv: Optional[List[str]] = None) -> int:
@@ -84,7 +87,7 @@ def main(argv: Optional[List[str]] = None) -> int:
     try:
         # Get user preferences
         prefs_path = Path("~/.config/mvcs/prefs.yaml").expanduser()
-        prefs = mvcs.Prefs.from_yaml_file(prefs_path) if prefs_path.is_file() else None
+        prefs = mvcs.Prefs.from_yaml_file_cached(prefs_path) if prefs_path.is_file() else None
 
         # Get configuration from command-line arguments
         config = mvcs.Config.from_argv(argv, prefs=prefs)
@@ -92,6 +95,7 @@ def main(argv: Optional[List[str]] = None) -> int:
         # Dispatch subcommand handler
         {
             mvcs.Subcommand.CLIP: handle_clip,
+            mvcs.Subcommand.CONVERT: handle_convert,
             mvcs.Subcommand.HELP: handle_help,
             mvcs.Subcommand.RUN: handle_run,
         }[config.subcommand](config)
@@ -1,19 +1,28 @@
 "Configuration module."
 
 import enum
+import functools
 import getopt
-from collections import UserDict
+import pickle
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, NamedTuple, Optional, Type, TypeVar
-
-import yaml
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Type, TypeVar
 
 from mvcs.error import Error
 
 ReplaceType = TypeVar("ReplaceType", bound="Replace")
-class Replace(UserDict): # pylint: disable=too-many-ancestors
+class Replace(dict):
     "String replacement mapping."
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compiled: Optional[Tuple[Optional[Dict[int, str]], Tuple[Tuple[str, str], ...]]] \
+                = None
+
+    def __setitem__(self, key: str, value: str):
+        super().__setitem__(key, value)
+        self._compiled = None
+
     @classmethod
     def from_dict(cls: Type[ReplaceType], data: Dict[str, str]) -> ReplaceType:
         "Create `Replace` from an untyped `dict` (YAML deserialization result)."
@@ -27,20 +36,109 @@ class Replace(UserDict): # pylint: disable=too-many-ancestors
 
         return cls(data)
 
+    def copy(self: ReplaceType) -> ReplaceType:
+        "Return a shallow copy that preserves the `Replace` type."
+        return type(self)(self)
+
     def apply(self, target: str) -> str:
         "Apply replacements to a target string and return the result."
-        for (key, value) in self.items():
+
+        # Single-character keys are merged into one translation table so the
+        # common case is a single C-level pass over the target, with a
+        # per-pair scan only for multi-character keys
+        if self._compiled is None:
+            single = {key: value for (key, value) in self.items() if len(key) == 1}
+            multi_pairs = tuple(
+                (key, value) for (key, value) in self.items() if len(key) > 1
+            )
+            self._compiled = (str.maketrans(single) if single else None, multi_pairs)
+
+        (table, multi) = self._compiled
+        if table is not None:
+            target = target.translate(table)
+        for (key, value) in multi:
             target = target.replace(key, value)
         return target
 
+# Path construction does flavor and parsing work worth amortizing when the
+# same string recurs (defaults, repeated CLI invocations, job file fields)
+@functools.lru_cache(maxsize=256)
+def path_from_str(path_s: str) -> Path:
+    "Build a `Path` from a string, sharing instances for repeated inputs."
+    return Path(path_s)
+
+def jobs_from_value(value: Any) -> int:
+    "Parse and validate a parallel job count."
+
+    try:
+        jobs = int(value)
+    except (TypeError, ValueError):
+        raise Error(f"invalid job count: {value}")
+    if jobs < 1:
+        raise Error(f"job count must be positive: {value}")
+    return jobs
+
+def ffmpeg_threads_from_value(value: Any) -> int:
+    "Parse and validate a per-ffmpeg thread count."
+
+    try:
+        threads = int(value)
+    except (TypeError, ValueError):
+        raise Error(f"invalid thread count: {value}")
+    if threads < 1:
+        raise Error(f"thread count must be positive: {value}")
+    return threads
+
+# Cache format version for the pickled preferences sidecar
+PREFS_CACHE_VERSION = 4
+
+# `Prefs` field name to YAML dict key translations
+PREFS_DICT_KEYS = {
+    "ffmpeg_threads": "ffmpeg-threads",
+    "filename_replace": "filename-replace",
+    "job_path": "job-path",
+    "jobs": "jobs",
+    "output_dir": "output-dir",
+    "output_ext": "output-ext",
+    "video_dir": "video-dir",
+    "video_ext": "video-ext",
+    "video_filename_format": "video-filename-format",
+}
+
+# All YAML dict keys accepted in a preferences file
+PREFS_KNOWN_KEYS = frozenset(PREFS_DICT_KEYS.values())
+
+# Sentinel distinguishing an absent dict key from any real value, so each
+# optional field costs one lookup instead of a membership test plus a read
+_MISSING = object()
+
+# `Prefs` field parsers, built once at import instead of per `from_dict` call
+PREFS_FIELD_PARSERS = (
+    ("ffmpeg_threads", ffmpeg_threads_from_value),
+    ("job_path", lambda x: path_from_str(str(x))),
+    ("jobs", jobs_from_value),
+    ("filename_replace", Replace.from_dict),
+    # Extensions and formats recur across every filename they touch, so keep
+    # one interned copy per unique string
+    ("output_dir", lambda x: path_from_str(str(x))),
+    ("output_ext", lambda x: sys.intern(str(x))),
+    ("video_dir", lambda x: path_from_str(str(x))),
+    ("video_ext", lambda x: sys.intern(str(x))),
+    ("video_filename_format", lambda x: sys.intern(str(x))),
+)
+
 PrefsType = TypeVar("PrefsType", bound="Prefs")
 class Prefs(NamedTuple):
     "User preferences to choose default behavior."
 
+    # Default number of threads each ffmpeg process may use.
+    ffmpeg_threads: int = 2
     # String replacement map for input and output filenames.
     filename_replace: Replace = Replace()
     # Default path to the job file.
     job_path: Path = Path("clip.yaml")
+    # Default number of clips to write in parallel.
+    jobs: int = 1
     # Default path to the output clips directory.
     output_dir: Path = Path(".")
     # Default output clip file extension.
@@ -52,19 +150,12 @@ class Prefs(NamedTuple):
     # Default input video filename format.
     video_filename_format: str = "%Y-%m-%d %H-%M-%S"
 
-    @classmethod
-    def dict_key(cls: Type[PrefsType], field: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def dict_key(field: str) -> str:
         "Get the untyped `dict` key name for a `Prefs` field."
         try:
-            return {
-                "filename_replace": "filename-replace",
-                "job_path": "job-path",
-                "output_dir": "output-dir",
-                "output_ext": "output-ext",
-                "video_dir": "video-dir",
-                "video_ext": "video-ext",
-                "video_filename_format": "video-filename-format",
-            }[field]
+            return PREFS_DICT_KEYS[field]
         except KeyError:
             raise Error(f"invalid field: {field}")
 
@@ -73,21 +164,12 @@ class Prefs(NamedTuple):
         "Create `Prefs` from an untyped `dict` (YAML deserialization result)."
 
         prefs = {}
-        # pylint: disable=unnecessary-lambda
-        for (field, value_fn) in (
-                ("job_path", lambda x: Path(str(x))),
-                ("filename_replace", lambda x: Replace.from_dict(x)),
-                ("output_dir", lambda x: Path(str(x))),
-                ("output_ext", lambda x: str(x)),
-                ("video_dir", lambda x: Path(str(x))),
-                ("video_ext", lambda x: str(x)),
-                ("video_filename_format", lambda x: str(x)),
-        ):
-            key = cls.dict_key(field)
-            if key in data:
-                prefs[field] = value_fn(data[key])
-
-        unknown_keys = set(data.keys()) - set(cls.dict_key(k) for k in cls._fields)
+        for (field, value_fn) in PREFS_FIELD_PARSERS:
+            value = data.get(cls.dict_key(field), _MISSING)
+            if value is not _MISSING:
+                prefs[field] = value_fn(value)
+
+        unknown_keys = data.keys() - PREFS_KNOWN_KEYS
         if unknown_keys:
             raise Error(f"unknown preferences: {unknown_keys}")
 
@@ -97,13 +179,55 @@ class Prefs(NamedTuple):
     def from_yaml_file(cls: Type[PrefsType], path: Path) -> PrefsType:
         "Create a `Prefs` from a YAML file."
 
-        with path.open(encoding="utf-8") as file:
-            data = yaml.safe_load(file)
-            if data is None:
-                return cls()
-            if isinstance(data, dict):
-                return cls.from_dict(data)
-            raise Error(f"invalid prefs file: {data}")
+        # Deferred so argv-only invocations never pay for the PyYAML import;
+        # repeated calls hit sys.modules and are effectively free
+        import yaml # pylint: disable=import-outside-toplevel
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+        # Hand libyaml the raw bytes in one contiguous buffer; it decodes
+        # UTF-8 itself, so a Python-level text stream would only add an
+        # extra decode/encode round trip
+        data = yaml.load(path.read_bytes(), Loader=loader)
+        if data is None:
+            return cls()
+        if isinstance(data, dict):
+            return cls.from_dict(data)
+        raise Error(f"invalid prefs file: {data}")
+
+    @classmethod
+    def from_yaml_file_cached(cls: Type[PrefsType], path: Path) -> PrefsType:
+        """Create a `Prefs` from a YAML file, keeping a pickle cache.
+
+        The parsed preferences are cached in `~/.cache/mvcs/prefs.pkl` keyed
+        by the source file's size and mtime, so repeated invocations skip the
+        YAML parse entirely until the preferences file changes.
+        """
+
+        try:
+            stat = path.stat()
+        except OSError as ex:
+            raise Error(ex)
+
+        # The version guards against caches written by an older mvcs whose
+        # types pickle differently
+        key = (PREFS_CACHE_VERSION, str(path), stat.st_size, stat.st_mtime_ns)
+        cache_path = Path("~/.cache/mvcs/prefs.pkl").expanduser()
+        try:
+            with cache_path.open("rb") as file:
+                (cached_key, prefs) = pickle.load(file)
+            if cached_key == key and isinstance(prefs, cls):
+                return prefs
+        except (OSError, pickle.PickleError, EOFError, TypeError, ValueError):
+            pass
+
+        prefs = cls.from_yaml_file(path)
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with cache_path.open("wb") as file:
+                pickle.dump((key, prefs), file, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+        return prefs
 
 @enum.unique
 class Subcommand(enum.Enum):
@@ -111,17 +235,109 @@ class Subcommand(enum.Enum):
 
     # Add a new clip to the job file.
     CLIP = enum.auto()
+    # Convert the job file to the faster-loading JSON format.
+    CONVERT = enum.auto()
     # Show program usage and exit.
     HELP = enum.auto()
     # Run the job file to process videos and produce clips.
     RUN = enum.auto()
 
+# Subcommand names accepted as the first positional argument
+SUBCOMMANDS = {
+    "clip": Subcommand.CLIP,
+    "convert": Subcommand.CONVERT,
+    "help": Subcommand.HELP,
+    "run": Subcommand.RUN,
+}
+
+def path_opt(field: str, error: str):
+    "Build an option handler that stores a non-empty path argument."
+    def handler(config: Dict[str, Any], optarg: str, _prefs: Prefs):
+        if not optarg:
+            raise Error(error)
+        config[field] = path_from_str(optarg)
+    return handler
+
+def str_opt(field: str, error: str):
+    "Build an option handler that stores a non-empty string argument."
+    def handler(config: Dict[str, Any], optarg: str, _prefs: Prefs):
+        if not optarg:
+            raise Error(error)
+        config[field] = optarg
+    return handler
+
+def help_opt(config: Dict[str, Any], _optarg: str, _prefs: Prefs):
+    "Select the help subcommand."
+    config["subcommand"] = Subcommand.HELP
+
+def force_opt(config: Dict[str, Any], _optarg: str, _prefs: Prefs):
+    "Enable forced clip rewriting."
+    config["force"] = True
+
+def jobs_opt(config: Dict[str, Any], optarg: str, _prefs: Prefs):
+    "Set the number of parallel jobs."
+    config["jobs"] = jobs_from_value(optarg)
+
+def ffmpeg_threads_opt(config: Dict[str, Any], optarg: str, _prefs: Prefs):
+    "Set the number of threads each ffmpeg process may use."
+    config["ffmpeg_threads"] = ffmpeg_threads_from_value(optarg)
+
+def replace_opt(config: Dict[str, Any], optarg: str, prefs: Prefs):
+    "Add a filename replacement mapping, or reset the map when empty."
+    if not optarg:
+        config["filename_replace"] = prefs.filename_replace
+        return
+
+    # The map starts out shared with the preferences; clone it only when a
+    # mutation actually happens (most invocations never pass -r)
+    if config["filename_replace"] is prefs.filename_replace:
+        config["filename_replace"] = prefs.filename_replace.copy()
+
+    if optarg.startswith("=="):
+        config["filename_replace"]["="] = optarg[2:]
+    elif optarg.startswith("=") or "=" not in optarg:
+        raise Error(f"invalid replacement: {optarg}")
+    else:
+        (key, value) = optarg.split("=", maxsplit=1)
+        config["filename_replace"][key] = value
+
+# Command-line option dispatch table shared by every `Config.from_argv` call
+OPT_HANDLERS = {
+    "-h": help_opt,
+    "--help": help_opt,
+    "--ffmpeg-threads": ffmpeg_threads_opt,
+    "--force": force_opt,
+    "-i": path_opt("video_dir", "video directory path cannot be empty"),
+    "-j": path_opt("job_path", "job path cannot be empty"),
+    "--jobs": jobs_opt,
+    "-o": path_opt("output_dir", "output clip directory cannot be empty"),
+    "-r": replace_opt,
+    "--filename-replace": replace_opt,
+    "--output-ext": str_opt("output_ext", "output extension cannot be empty"),
+    "--video-ext": str_opt("video_ext", "video extension cannot be empty"),
+    "--video-filename-format": str_opt(
+        "video_filename_format", "video filename format cannot be empty",
+    ),
+}
+OPT_HANDLERS["--video-dir"] = OPT_HANDLERS["-i"]
+OPT_HANDLERS["--job-path"] = OPT_HANDLERS["-j"]
+OPT_HANDLERS["--output-dir"] = OPT_HANDLERS["-o"]
+
+# Default config shared by every prefs-less `Config.default` call; safe to
+# share because `Config` is immutable and option handlers clone the
+# replacement map before mutating it
+_DEFAULT_CONFIG: Optional["Config"] = None
+
 ConfigType = TypeVar("ConfigType", bound="Config")
 class Config(NamedTuple):
     "Command-line configuration."
 
     # Path to the clip.yaml job file.
     job_path: Path
+    # Number of clips to write in parallel.
+    jobs: int
+    # Number of threads each ffmpeg process may use.
+    ffmpeg_threads: int
     # String replacement map for input and output filenames.
     filename_replace: Replace
     # Default path to the output clips directory.
@@ -134,6 +350,8 @@ class Config(NamedTuple):
     video_ext: str
     # Input video filename format.
     video_filename_format: str
+    # Rewrite output clips even when they already exist.
+    force: bool = False
     # mvcs subcommand.
     subcommand: Subcommand = Subcommand.HELP
 
@@ -141,10 +359,19 @@ class Config(NamedTuple):
     def default(cls: Type[ConfigType], *, prefs: Optional[Prefs] = None) -> ConfigType:
         "Return a default config."
 
-        prefs = prefs if prefs is not None else Prefs()
+        global _DEFAULT_CONFIG # pylint: disable=global-statement
+        if prefs is None:
+            if _DEFAULT_CONFIG is None:
+                _DEFAULT_CONFIG = cls.default(prefs=Prefs())
+            return _DEFAULT_CONFIG # type: ignore
+
         return cls(
             job_path=prefs.job_path,
-            filename_replace=prefs.filename_replace.copy(),
+            jobs=prefs.jobs,
+            ffmpeg_threads=prefs.ffmpeg_threads,
+            # Shared with the preferences; anything that wants to mutate the
+            # map must clone it first (see `replace_opt`)
+            filename_replace=prefs.filename_replace,
             output_dir=prefs.output_dir,
             output_ext=prefs.output_ext,
             video_dir=prefs.video_dir,
@@ -153,7 +380,6 @@ class Config(NamedTuple):
         )
 
     @classmethod
-    # pylint: disable=too-many-branches,too-many-statements
     def from_argv(
             cls: Type[ConfigType],
             argv: List[str],
@@ -166,9 +392,12 @@ class Config(NamedTuple):
         config: Dict[str, Any] = cls.default(prefs=prefs)._asdict()
         try:
             opts, args = getopt.getopt(argv[1:], "hi:j:o:r:", longopts=[
+                "ffmpeg-threads=",
                 "filename-replace=",
+                "force",
                 "help",
                 "job-path=",
+                "jobs=",
                 "output-dir=",
                 "output-ext=",
                 "video-dir=",
@@ -179,62 +408,16 @@ class Config(NamedTuple):
             raise Error(ex)
 
         if args:
-            subcommand = {
-                "clip": Subcommand.CLIP,
-                "help": Subcommand.HELP,
-                "run": Subcommand.RUN,
-            }.get(args[0].lower())
+            subcommand = SUBCOMMANDS.get(args[0].lower())
             if subcommand is None:
                 raise Error(f"invalid subcommand: {args[0]}")
             config["subcommand"] = subcommand
 
         for opt, optarg in opts:
-            if opt in ("-h", "--help"):
-                config["subcommand"] = Subcommand.HELP
-            elif opt in ("-i", "--video-dir"):
-                if optarg:
-                    config["video_dir"] = Path(optarg)
-                else:
-                    raise Error("video directory path cannot be empty")
-            elif opt in ("-j", "--job-path"):
-                if optarg:
-                    config["job_path"] = Path(optarg)
-                else:
-                    raise Error("job path cannot be empty")
-            elif opt in ("-o", "--output-dir"):
-                if optarg:
-                    config["output_dir"] = Path(optarg)
-                else:
-                    raise Error("output clip directory cannot be empty")
-            elif opt in ("-r", "--filename-replace"):
-                if optarg:
-                    if optarg.startswith("=="):
-                        config["filename_replace"]["="] = optarg[2:]
-                    elif optarg.startswith("="):
-                        raise Error(f"invalid replacement: {optarg}")
-                    elif "=" in optarg:
-                        (key, value) = optarg.split("=", maxsplit=1)
-                        config["filename_replace"][key] = value
-                    else:
-                        raise Error(f"invalid replacement: {optarg}")
-                else:
-                    config["filename_replace"] = prefs.filename_replace.copy()
-            elif opt == "--output-ext":
-                if optarg:
-                    config["output_ext"] = optarg
-                else:
-                    raise Error("output extension cannot be empty")
-            elif opt == "--video-ext":
-                if optarg:
-                    config["video_ext"] = optarg
-                else:
-                    raise Error("video extension cannot be empty")
-            elif opt == "--video-filename-format":
-                if optarg:
-                    config["video_filename_format"] = optarg
-                else:
-                    raise Error("video filename format cannot be empty")
-            else:
+            try:
+                handler = OPT_HANDLERS[opt]
+            except KeyError:
                 raise Error(f"unhandled option: {opt}")
+            handler(config, optarg, prefs)
 
         return cls(**config) # type: ignore
@@ -44,9 +44,9 @@
 #           - time: "30 - 45"
 #             title: "after the epoch"
 
-import os.path
-from os.path import isfile, join
-from os import listdir
+import logging
+import operator
+import os
 import yaml
 from datetime import datetime
 from datetime import timedelta
@@ -56,6 +56,12 @@ from mvcs.time import datetime_from_str, datetime_to_str, timedelta_from_str, ti
 from mvcs.job import Video
 from mvcs.error import Error
 
+# Prefer the libyaml loader/dumper when PyYAML was built with it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+logger = logging.getLogger(__name__)
+
 def generate_template(document, output_dir, video_dir):
     # Example YAML
     data = {
@@ -64,20 +70,14 @@ def generate_template(document, output_dir, video_dir):
         'videos': []
     }
 
-    print(yaml.safe_dump(data))
-    stream = open(document, 'w')
-    yaml.safe_dump(data, stream)
-    stream.close()
+    with open(document, 'w', encoding='utf-8') as stream:
+        yaml.dump(data, stream, Dumper=YamlDumper)
 
 def check_template(document, output_dir, video_dir):
-    print("Checking for template: " + str(document))
-    if os.path.isfile(document):
-        print('YAML File detected.')
-
-    else:
-        print('Generating the file for you.')
+    logger.debug("checking for template: %s", document)
+    if not pathlib.Path(document).exists():
+        logger.debug("generating job file: %s", document)
         generate_template(document, output_dir, video_dir)
-        check_template(document, output_dir, video_dir)
 
 # def path_str(self, date: datetime.datetime, epoch: datetime.timedelta, title: str) -> str:
 #     date_str = (date + epoch).strftime("%Y-%m-%d %H:%M:%S")
@@ -89,128 +89,108 @@ def current_time():
     return datetime.now()
 
 def latest_video(config: Config, date_time, extension, path):
-    onlyfiles = [f for f in listdir(path) if isfile(join(path, f))]
-    extension = [item for item in onlyfiles if extension in item]
-
-    video_list = []
-
-    for item in extension:
-        video = Video.from_path(config, pathlib.Path(item))._replace(title=item)
-
-        video_list.append(video)
+    "Find the newest video file in `path` that was recorded before `date_time`."
+
+    # DirEntry.is_file() uses the directory entry data where possible, so the
+    # whole scan is one generator pass with no intermediate lists; keying the
+    # max on `date` compares datetimes directly instead of whole tuples
+    with os.scandir(path) as entries:
+        candidates = (
+            Video.from_path(config, pathlib.Path(entry.name))._replace(title=entry.name)
+            for entry in entries
+            if entry.name.endswith(extension) and entry.is_file()
+        )
+        best = max(
+            (video for video in candidates if video.date < date_time),
+            key=operator.attrgetter("date"),
+            default=None,
+        )
+
+    if best is None:
+        raise Error(f"no video files found in: {path}")
+    return best
+
+class JobFile:
+    "In-memory view of a clip.yaml job file, flushed back to disk on demand."
+
+    def __init__(self, path, contents):
+        self.path = path
+        self.contents = contents if contents else {}
+        self.contents.setdefault('videos', [])
+        # Index the video entries by date so lookups are O(1) instead of a
+        # linear scan per added clip
+        self._by_date = {item['date']: item for item in self.contents['videos']}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        "Read and parse the job file once."
+        with open(path, "r") as f:
+            contents = yaml.load(f, Loader=YamlLoader)
+        return cls(path, contents)
+
+    def add_video(self, video, epoch, title):
+        "Add a video entry for `video` unless one already exists."
+        date_time = datetime_to_str(video.date)
+        logger.debug("adding video: %s", date_time)
+
+        if date_time in self._by_date:
+            logger.debug("found existing video")
+            return date_time
 
-    video_list = sorted(video_list, key=lambda x: x.date)
-    return video_list[-1]
-
-def add_video(document, date_time, epoch, title):
-    date_time = datetime_to_str(date_time.date)
-    print(date_time)
-    print(type(date_time))
-    with open(document, "r") as f:
-        contents = yaml.safe_load(f)
-
-    print(contents['videos'])
-    # Check for existing video.
-
-    if not contents['videos']:
-        print("videos is empty")
-        # Add Video
-        print("Before: ", contents)
-        print(date_time)
         data = {
             'date': date_time,
             'epoch': epoch,
             'title': title,
             'clips': []
         }
-                
-        contents['videos'].append(data)
-        print("After: ", contents)
-
-        with open(document, "w") as f:
-            yaml.safe_dump(contents, f)
-
+        self.contents['videos'].append(data)
+        self._by_date[date_time] = data
+        self.dirty = True
         return date_time
-        print("End of video function.")
-
-    if contents['videos']:
-        print("Starting with Videos.")
-        for video in contents['videos']:
-            print(video)
-            print("Vidoes Section Exists.")
-            if video['date'] == date_time:
-                print("Found Existing Video.")
-
-                return "Found Existing Video."
-        
-            else:
-                print("Running else statement!!!")
-                # Add Video
-                print("Before: ", contents)
-                print(date_time)
-                data = {
-                    'date': date_time,
-                    'epoch': epoch,
-                    'title': title,
-                    'clips': []
-                }
-
-                contents['videos'].append(data)
-                print("After: ", contents)
-
-                with open(document, "w") as f:
-                    yaml.safe_dump(contents, f)
-
-                return date_time
-                print("End of video function.")
-
-def add_clip(document, latest_video, window, title):
-    print("Clipping")
-    with open(document, "r") as f:
-        contents = yaml.safe_load(f)
 
-    data = {
-        'time': window,
-        'title': title
-    }
-
-    for item in contents['videos']:
-        if item['date'] == datetime_to_str(latest_video.date):
-            print("Before: ", str(item))
-            item['clips'].append(data)
-            print("After: ", str(item))
-        
-    with open(document, "w") as f:
-        yaml.safe_dump(contents, f)
+    def add_clip(self, latest_video, window, title):
+        "Add a clip entry to the video matching `latest_video`."
+        data = {
+            'time': window,
+            'title': title
+        }
 
-def trigger_clip(config: Config, video_time, clip_before_length, clip_after_length, document, latest_video, title):
+        item = self._by_date.get(datetime_to_str(latest_video.date))
+        if item is None:
+            return
+
+        # `str(item)` dumps the whole video entry, so only build it when
+        # debug logging is actually enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("before: %s", str(item))
+        item['clips'].append(data)
+        if debug:
+            logger.debug("after: %s", str(item))
+        self.dirty = True
+
+    def flush(self):
+        "Write the contents back to the job file if anything changed."
+        if not self.dirty:
+            return
+        with open(self.path, "w") as f:
+            yaml.dump(self.contents, f, Dumper=YamlDumper)
+        self.dirty = False
+
+def trigger_clip(config: Config, jobfile, latest_video, clip_before_length, clip_after_length, title):
     time = current_time()
     relative_time = time - latest_video.date
 
-    clip_before_length = timedelta(seconds=clip_before_length)
-    clip_after_length = timedelta(seconds=clip_after_length)
-
-    print("Current Time: {}".format(time))
-    print("Latest Video Time: {}".format(latest_video.date))
-    print("Relative Time: {}".format(relative_time))
-
-    start_window = relative_time - clip_before_length
-    start_window = timedelta_to_str(start_window)
-
-    end_window = relative_time + clip_after_length
-    end_window = timedelta_to_str(end_window)
-
-
-    print("Start Window: {}".format(start_window))
-    print("End Window: {}".format(end_window))
-
-    # # Fix if less than 0
-    # if start_window <= 0:
-    #     start_window = 0
+    logger.debug("current time: %s", time)
+    logger.debug("latest video time: %s", latest_video.date)
+    logger.debug("relative time: %s", relative_time)
 
-    window = str(start_window) + " - " + str(end_window)
-    print("Window: {}".format(window))
+    # Format each window endpoint exactly once; timedelta_to_str already
+    # formats from integer components without going through str(timedelta)
+    start_window = timedelta_to_str(relative_time - timedelta(seconds=clip_before_length))
+    end_window = timedelta_to_str(relative_time + timedelta(seconds=clip_after_length))
+    window = f"{start_window} - {end_window}"
+    logger.debug("window: %s", window)
 
-    print(type(latest_video.date))
-    
-    add_clip(document, latest_video, window, title)
+    jobfile.add_clip(latest_video, window, title)
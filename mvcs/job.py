@@ -1,17 +1,154 @@
 "Job execution module."
 
+import collections
+import concurrent.futures
 import datetime
+import json
+import os
+import pickle
+import re
 import subprocess
-from itertools import chain
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, NamedTuple, Type, TypeVar
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type, TypeVar, Union
 
-import yaml
-
-from mvcs.config import Config
+from mvcs.config import Config, path_from_str
 from mvcs.error import Error
 from mvcs.time import datetime_from_str, timedelta_from_str, timedelta_to_path_str
 
+# Translation table mapping filename-hostile characters to "-"
+PATHSAFE_TRANS = str.maketrans({bad: "-" for bad in "\"*/:?\\|<>"})
+
+# Clip time window: two timedelta strings around "-", with optional spaces
+CLIP_TIME_RE = re.compile(r"^\s*([^-\s]+)\s*-\s*([^-\s]+)\s*$")
+
+# Sentinel distinguishing an absent dict key from any real value, so each
+# optional field costs one lookup instead of a membership test plus a read
+_MISSING = object()
+
+# Stem shape produced by the default video filename format, matched directly
+# to skip strptime's per-call format interpretation on directory scans
+DEFAULT_VIDEO_FILENAME_FORMAT = "%Y-%m-%d %H-%M-%S"
+DEFAULT_STEM_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2}) (\d{1,2})-(\d{1,2})-(\d{1,2})$")
+
+# Known keys for each job file mapping, checked with one set difference
+CLIP_KNOWN_KEYS = frozenset(("time", "title"))
+VIDEO_KNOWN_KEYS = frozenset(("clips", "date", "epoch", "title"))
+JOB_KNOWN_KEYS = frozenset(("output-dir", "video-dir", "videos"))
+
+# Common ffmpeg arguments: never read stdin, and only log real errors
+FFMPEG_BASE_CMD = ("ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error")
+
+# Stream copy snaps cuts to keyframes, so an existing clip's duration can
+# legitimately differ from the requested window by a few seconds
+PROBE_TOLERANCE_SECONDS = 5.0
+
+# Parsed job documents keyed by path, so loading the same unchanged file
+# again in one process skips the YAML parse; deserialization never mutates
+# the raw document, so cached entries can be reused directly
+_YAML_CACHE: "collections.OrderedDict[Path, Tuple[Tuple[int, int], Any]]" = \
+        collections.OrderedDict()
+_YAML_CACHE_MAX = 100
+
+def parse_job_document(path: Path) -> Any:
+    "Parse a raw job document, choosing the parser from the file extension."
+
+    if path.suffix == ".json":
+        # The job schema is plain scalars and containers, so the much faster
+        # JSON parser can load it when the user opts in via `mvcs convert`
+        return json.loads(path.read_bytes())
+
+    # Deferred so subcommands that never read YAML don't pay for the import
+    import yaml # pylint: disable=import-outside-toplevel
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(path.read_bytes(), Loader=loader)
+
+def convert_job_file(src: Path, dst: Path):
+    "Convert a job file to the faster-loading JSON format."
+
+    try:
+        data = parse_job_document(src)
+    except OSError as ex:
+        raise Error(ex)
+
+    try:
+        with dst.open("w", encoding="utf-8") as file:
+            # YAML may hand back datetime objects for unquoted timestamps;
+            # their str() form is accepted back by the datetime parser
+            json.dump(data, file, separators=(",", ":"), default=str)
+    except (OSError, TypeError, ValueError) as ex:
+        raise Error(ex)
+
+def load_job_document(path: Path, stat: os.stat_result) -> Any:
+    """Load the raw job document, keeping a pickle sidecar next to the file.
+
+    Unpickling the parsed document is much faster than re-parsing the YAML,
+    so cold starts only pay for the parse when the job file has changed. The
+    sidecar is invalidated by the source file's size and mtime, and any
+    cache problem silently falls back to parsing the YAML.
+    """
+
+    cache_path = path.with_suffix(path.suffix + ".pkl")
+    key = (stat.st_size, stat.st_mtime_ns)
+    try:
+        with cache_path.open("rb") as file:
+            (cached_key, data) = pickle.load(file)
+        if cached_key == key:
+            return data
+    except (OSError, pickle.PickleError, EOFError, TypeError, ValueError):
+        pass
+
+    data = parse_job_document(path)
+    try:
+        with cache_path.open("wb") as file:
+            pickle.dump((key, data), file, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return data
+
+def probe_duration(path: Path) -> Optional[float]:
+    "Get a media file's duration in seconds with ffprobe, or `None` on failure."
+
+    cmd = (
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=nw=1:nk=1",
+        path,
+    )
+    try:
+        result = subprocess.run(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        return float(result.stdout)
+    except ValueError:
+        return None
+
+def run_ffmpeg(cmd: Sequence[Union[Path, str]]):
+    """Run an ffmpeg command, surfacing its stderr only when it fails.
+
+    Plain file redirections with no `preexec_fn`, no shell, and no custom
+    environment keep the launch on CPython's `posix_spawn` fast path, which
+    skips the fork+fd-close loop for every short-lived ffmpeg process.
+    """
+
+    result = subprocess.run(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        raise Error(result.stderr.decode(errors="replace").strip())
+
 ClipType = TypeVar("ClipType", bound="Clip")
 class Clip(NamedTuple):
     "Data about a single video clip that should be created."
@@ -27,69 +164,106 @@ class Clip(NamedTuple):
     def from_dict(cls: Type[ClipType], data: Dict[str, Any]) -> ClipType:
         "Create a `Clip` from an untyped `dict` (YAML deserialization result)."
 
+        unknown_keys = data.keys() - CLIP_KNOWN_KEYS
+        if unknown_keys:
+            raise Error(f"unknown clip data: {unknown_keys}: {data}")
+
         try:
-            clip: Dict[str, Any] = {
-                "title": str(data["title"]),
-            }
-            time = [timedelta_from_str(t.strip()) for t in str(data["time"]).split("-", maxsplit=1)]
-            (clip["start"], clip["end"]) = time
-        except (KeyError, ValueError) as ex:
+            # Interning collapses the repeated titles common in big job
+            # files down to one allocation per unique string
+            title = sys.intern(str(data["title"]))
+            time_s = str(data["time"])
+        except KeyError as ex:
             raise Error(f"bad clip data: {ex}: {data}")
 
-        if clip["end"] <= clip["start"]:
+        match = CLIP_TIME_RE.match(time_s)
+        if not match:
+            raise Error(f"bad clip time: {data}")
+        start = timedelta_from_str(match.group(1))
+        end = timedelta_from_str(match.group(2))
+
+        if end <= start:
             raise Error(f"bad clip start/end: {data}")
 
-        if not clip["title"]:
+        if not title:
             raise Error(f"bad clip title: {data}")
 
-        return cls(**clip) # type: ignore
+        return cls(end=end, start=start, title=title)
 
     def path_str(
             self,
             config: Config,
-            date: datetime.datetime,
+            date_str: str,
             epoch: datetime.timedelta,
             title: str,
     ) -> str:
-        "Get the file name for a clip."
+        """Get the file name for a clip.
+
+        `date_str` is the preformatted timestamp of the video's epoch, which
+        is shared by all clips of a video and so formatted once by the caller.
+        """
+
+        start_str = timedelta_to_path_str(self.start - epoch)
+        path_str = f"{date_str} - T+{start_str} - {title} - {self.title}".casefold()
+
+        path_str = config.filename_replace.apply(path_str.translate(PATHSAFE_TRANS))
+        return f"{path_str}.{config.output_ext}"
+
+    def should_write(self, dst: Path, force: bool = False, src: Optional[Path] = None) -> bool:
+        "Decide whether the clip output file needs to be (re)written."
+
+        if force or not dst.exists():
+            return True
+
+        # An output newer than its source is assumed complete, which skips
+        # the ffprobe subprocess on repeat runs
+        if src is not None:
+            try:
+                if dst.stat().st_mtime_ns >= src.stat().st_mtime_ns:
+                    print(f"skipping existing clip: {dst}")
+                    return False
+            except OSError:
+                pass
 
-        path_str = " - ".join((
-            (date + epoch).strftime("%Y-%m-%d %H:%M:%S"),
-            f"T+{timedelta_to_path_str(self.start - epoch)}",
-            title,
-            f"{self.title}",
-        )).casefold()
+        duration = probe_duration(dst)
+        expected = (self.end - self.start).total_seconds()
+        if duration is not None and abs(duration - expected) > PROBE_TOLERANCE_SECONDS:
+            print(f"rewriting clip with unexpected duration: {dst}")
+            return True
 
-        for (old, new) in chain(
-                ((bad, "-") for bad in "\"*/:?\\|<>"),
-                config.filename_replace.items(),
-        ):
-            path_str = path_str.replace(old, new)
+        print(f"skipping existing clip: {dst}")
+        return False
 
-        return ".".join((path_str, config.output_ext))
+    def write(self, src: Path, dst: Path, force: bool = False, threads: int = 2):
+        """Use ffmpeg to write the lossless video clip file.
 
-    def write(self, src: Path, dst: Path):
-        "Use ffmpeg to write the lossless video clip file."
+        The `-ss` before `-i` makes ffmpeg seek the input container directly
+        instead of demuxing and discarding everything before the start time.
+        Because the streams are copied without re-encoding, the cut may snap
+        to the nearest keyframe before the requested start.
+        """
 
-        if dst.exists():
-            print(f"skipping existing clip: {dst}")
+        if not self.should_write(dst, force, src=src):
             return
 
-        cmd = (
-            "ffmpeg",
+        cmd = FFMPEG_BASE_CMD + (
+            "-y",
+            # Capping threads keeps concurrent jobs from oversubscribing
+            # cores; mostly cosmetic for stream copy
+            "-threads", str(threads),
+            # Keyframe cuts make decoder-assisted accurate seeking pointless
+            "-noaccurate_seek",
             "-ss", str(self.start.total_seconds()),
-            "-i", str(src),
+            "-i", src,
             "-c:a", "copy",
             "-c:v", "copy",
             "-map", "0:v",
             "-map", "0:a",
             "-t", str((self.end - self.start).total_seconds()),
-            str(dst),
+            "-avoid_negative_ts", "make_zero",
+            dst,
         )
-        try:
-            subprocess.run(cmd, check=True)
-        except subprocess.CalledProcessError as ex:
-            raise Error(ex)
+        run_ffmpeg(cmd)
 
 VideoType = TypeVar("VideoType", bound="Video")
 class Video(NamedTuple):
@@ -104,36 +278,39 @@ class Video(NamedTuple):
     # Virtual "start" time in the source video (for output filename)
     epoch: datetime.timedelta = datetime.timedelta()
 
+    @staticmethod
+    def parse_clips(data: List[Dict[str, Any]]) -> List[Clip]:
+        "Parse a raw clip list into `Clip` objects in a single tight pass."
+
+        from_dict = Clip.from_dict
+        return [from_dict(x) for x in data]
+
     @classmethod
     def from_dict(cls: Type[VideoType], data: Dict[str, Any]) -> VideoType:
         "Create a `Video` from an untyped `dict` (YAML deserialization result)."
 
+        unknown_keys = data.keys() - VIDEO_KNOWN_KEYS
+        if unknown_keys:
+            raise Error(f"unknown video data: {unknown_keys}: {data}")
+
         try:
             video: Dict[str, Any] = {
                 "date": datetime_from_str(str(data["date"])),
-                "title": str(data["title"])
+                "title": sys.intern(str(data["title"]))
             }
         except KeyError as ex:
             raise Error(f"bad video data: {ex}: {data}")
 
-        for (key, validate_fn, value_fn) in (
-                (
-                    "clips",
-                    lambda xs: isinstance(xs, list) \
-                            and not [x for x in xs if not isinstance(x, dict)],
-                    lambda xs: [Clip.from_dict(x) for x in xs],
-                ),
-                (
-                    "epoch",
-                    lambda x: True,
-                    lambda x: timedelta_from_str(str(x)),
-                ),
-        ):
-            if key in data:
-                value = data[key]
-                if not validate_fn(value):
-                    raise Error(f"bad video data: {key}: {value}")
-                video[key] = value_fn(value)
+        clips = data.get("clips", _MISSING)
+        if clips is not _MISSING:
+            if not isinstance(clips, list) \
+                    or not all(isinstance(x, dict) for x in clips):
+                raise Error(f"bad video data: clips: {clips}")
+            video["clips"] = cls.parse_clips(clips)
+
+        epoch = data.get("epoch", _MISSING)
+        if epoch is not _MISSING:
+            video["epoch"] = timedelta_from_str(str(epoch))
 
         return cls(**video) # type: ignore
 
@@ -145,28 +322,98 @@ class Video(NamedTuple):
             raise Error(f"{path} has invalid file extension")
 
         fmt = config.filename_replace.apply(config.video_filename_format)
-        try:
-            date = datetime.datetime.strptime(path.stem, fmt)
-        except ValueError:
-            raise Error(f"{path} does not match format {fmt}")
+        if fmt == DEFAULT_VIDEO_FILENAME_FORMAT:
+            match = DEFAULT_STEM_RE.match(path.stem)
+            if not match:
+                raise Error(f"{path} does not match format {fmt}")
+            (year, month, day, hour, minute, second) = match.groups()
+            try:
+                date = datetime.datetime(
+                    int(year), int(month), int(day),
+                    int(hour), int(minute), int(second),
+                )
+            except ValueError:
+                raise Error(f"{path} does not match format {fmt}")
+        else:
+            try:
+                date = datetime.datetime.strptime(path.stem, fmt)
+            except ValueError:
+                raise Error(f"{path} does not match format {fmt}")
         return cls(date=date, title="video")
 
-    def write_clips(self, config: Config, src_dir: Path, dst_dir: Path):
-        "Create all requested clips from the video."
+    def clip_tasks(
+            self,
+            config: Config,
+            src_dir: Path,
+            dst_dir: Path,
+            available: Optional[Dict[str, Path]] = None,
+    ) -> List[Tuple[Clip, Path, Path]]:
+        "Resolve the source and destination paths for every clip in the video."
 
         src_name = config.filename_replace.apply(self.date.strftime(config.video_filename_format))
         src = (src_dir / src_name).with_suffix(f".{config.video_ext}")
-        if not src.is_file():
+        if available is not None:
+            if src.name not in available:
+                raise Error(f"missing video file: {src}")
+        elif not src.is_file():
             raise Error(f"missing video file: {src}")
 
-        for clip in self.clips:
-            dst = dst_dir / clip.path_str(
-                config,
-                self.date,
-                self.epoch,
-                self.title,
+        date_str = (self.date + self.epoch).strftime("%Y-%m-%d %H:%M:%S")
+        return [
+            (
+                clip,
+                src,
+                dst_dir / clip.path_str(config, date_str, self.epoch, self.title),
             )
-            clip.write(src, dst)
+            for clip in self.clips
+        ]
+
+    def write_clips(
+            self,
+            config: Config,
+            src_dir: Path,
+            dst_dir: Path,
+            available: Optional[Dict[str, Path]] = None,
+    ):
+        "Create all requested clips from the video with one ffmpeg invocation."
+
+        # Sorting by start time keeps the batched seeks moving forward
+        # through the source container
+        pending = sorted(
+            (
+                (clip, src, dst)
+                for (clip, src, dst) in self.clip_tasks(config, src_dir, dst_dir, available)
+                if clip.should_write(dst, config.force, src=src)
+            ),
+            key=lambda task: task[0].start,
+        )
+        if not pending:
+            return
+
+        if len(pending) == 1:
+            (clip, src, dst) = pending[0]
+            clip.write(src, dst, force=True, threads=config.ffmpeg_threads)
+            return
+
+        # One invocation with an output group per clip, so ffmpeg opens and
+        # parses the source container only once for the whole video
+        cmd: List[Union[Path, str]] = [
+            *FFMPEG_BASE_CMD,
+            "-y",
+            "-threads", str(config.ffmpeg_threads),
+            "-i", pending[0][1],
+        ]
+        for (clip, _, dst) in pending:
+            cmd.extend((
+                "-ss", str(clip.start.total_seconds()),
+                "-c:a", "copy",
+                "-c:v", "copy",
+                "-map", "0:v",
+                "-map", "0:a",
+                "-t", str((clip.end - clip.start).total_seconds()),
+                dst,
+            ))
+        run_ffmpeg(cmd)
 
 JobType = TypeVar("JobType", bound="Job")
 class Job(NamedTuple):
@@ -183,32 +430,122 @@ class Job(NamedTuple):
     def from_dict(cls: Type[JobType], config: Config, data: Dict[str, Any]) -> JobType:
         "Create a `Job` from an untyped `dict` (YAML deserialization result)."
 
+        unknown_keys = data.keys() - JOB_KNOWN_KEYS
+        if unknown_keys:
+            raise Error(f"unknown job data: {unknown_keys}")
+
         videos = data.get("videos", [])
         if not isinstance(videos, list):
             raise Error(f"invalid videos: {videos}")
 
-        for video in videos:
+        # Validate and deserialize in one pass over the video list
+        def make_video(index: int, video: Any) -> Video:
             if not isinstance(video, dict):
-                raise Error(f"invalid video entry: {video}")
+                raise Error(f"invalid video entry [{index}]: {video}")
+            return Video.from_dict(video)
 
-        output_dir = Path(str(data.get("output-dir", config.output_dir)))
-        video_dir = Path(str(data.get("video-dir", config.video_dir)))
+        output_dir = path_from_str(str(data.get("output-dir", config.output_dir)))
+        video_dir = path_from_str(str(data.get("video-dir", config.video_dir)))
 
         return cls(
             output_dir=output_dir,
             video_dir=video_dir,
-            videos=[Video.from_dict(video) for video in videos],
+            videos=[make_video(index, video) for (index, video) in enumerate(videos)],
         )
 
     @classmethod
     def from_yaml_file(cls: Type[JobType], config: Config) -> JobType:
         "Create a `Job` from a YAML file."
 
-        with config.job_path.open(encoding="utf-8") as file:
-            return cls.from_dict(config, yaml.safe_load(file))
+        path = config.job_path
+        try:
+            stat = path.stat()
+        except OSError as ex:
+            raise Error(ex)
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = _YAML_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            _YAML_CACHE.move_to_end(path)
+            data = cached[1]
+        else:
+            data = load_job_document(path, stat)
+            _YAML_CACHE[path] = (key, data)
+            if len(_YAML_CACHE) > _YAML_CACHE_MAX:
+                _YAML_CACHE.popitem(last=False)
+
+        return cls.from_dict(config, data)
+
+    def scan_video_dir(self) -> Dict[str, Path]:
+        "List the source video files once, instead of a stat call per video."
+
+        try:
+            with os.scandir(self.video_dir) as entries:
+                return {
+                    entry.name: Path(entry.path)
+                    for entry in entries
+                    if entry.is_file()
+                }
+        except OSError as ex:
+            raise Error(ex)
+
+    def validate(self, config: Config):
+        """Check the whole job for problems before any ffmpeg process starts.
+
+        Catches missing source videos, clips that would overwrite each other,
+        and a missing output directory up front, so a bad entry late in the
+        job cannot waste the work already done for earlier entries.
+        """
+
+        problems: List[str] = []
+        available = self.scan_video_dir()
+        if self.output_dir.exists() and not self.output_dir.is_dir():
+            problems.append(f"output path is not a directory: {self.output_dir}")
+
+        seen: Dict[Path, str] = {}
+        for video in self.videos:
+            try:
+                tasks = video.clip_tasks(config, self.video_dir, self.output_dir, available)
+            except Error as ex:
+                problems.append(str(ex))
+                continue
+            for (clip, _, dst) in tasks:
+                if dst in seen:
+                    problems.append(
+                        f"clips {seen[dst]!r} and {clip.title!r} both write to: {dst}",
+                    )
+                else:
+                    seen[dst] = clip.title
+
+        if problems:
+            raise Error("; ".join(problems))
 
     def run(self, config: Config):
         "Run the batch job and create all requested clips."
 
-        for video in self.videos:
-            video.write_clips(config, self.video_dir, self.output_dir)
+        # One mkdir up front instead of relying on the directory existing
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as ex:
+            raise Error(ex)
+
+        available = self.scan_video_dir()
+        if config.jobs <= 1:
+            for video in self.videos:
+                video.write_clips(config, self.video_dir, self.output_dir, available)
+            return
+
+        # ffmpeg does the real work in a subprocess, so threads are enough to
+        # keep multiple stream-copy jobs in flight at once; each video is one
+        # batched ffmpeg invocation, so videos are the unit of parallelism
+        with concurrent.futures.ThreadPoolExecutor(max_workers=config.jobs) as executor:
+            futures = [
+                executor.submit(
+                    video.write_clips, config, self.video_dir, self.output_dir, available,
+                )
+                for video in self.videos
+            ]
+            # as_completed surfaces a failure as soon as any video's ffmpeg
+            # exits nonzero, instead of waiting on submission order
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
@@ -1,50 +1,71 @@
 "Time handling module."
 
 import datetime
+import functools
+import re
 from typing import Tuple
 
 from mvcs.error import Error
 
+# CCYY-MM-DD datetime with "T" or " " separating the date from the time;
+# zero-padding is optional for everything except the year
+_DATETIME_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})[T ](\d{1,2}):(\d{1,2}):(\d{1,2})$")
+
+# Optionally-negated [[H:]M:]S duration with optional zero-padding
+_TIMEDELTA_RE = re.compile(r"^(-)?(\d+)(?::(\d+))?(?::(\d+))?$")
+
+# Job files repeat the same timestamp strings across entries, and the
+# parsed objects are immutable, so memoizing the parsers is safe
+@functools.lru_cache(maxsize=4096)
 def datetime_from_str(dt_s: str) -> datetime.datetime:
     "Parse a `str` as a `datetime.datetime` object."
 
-    for sep in ("T", " "):
-        try:
-            return datetime.datetime.strptime(dt_s, f"%Y-%m-%d{sep}%H:%M:%S")
-        except ValueError:
-            pass
-    raise Error(f"error parsing datetime: {dt_s}")
+    # Cheap structural filter: valid inputs are 14-19 chars with a four-digit
+    # year, so most junk is rejected before the regex engine runs
+    if not 14 <= len(dt_s) <= 19 or dt_s[4] != "-":
+        raise Error(f"error parsing datetime: {dt_s}")
+
+    match = _DATETIME_RE.match(dt_s)
+    if not match:
+        raise Error(f"error parsing datetime: {dt_s}")
+    (year, month, day, hour, minute, second) = match.groups()
+    try:
+        return datetime.datetime(
+            int(year), int(month), int(day),
+            int(hour), int(minute), int(second),
+        )
+    except ValueError:
+        raise Error(f"error parsing datetime: {dt_s}")
 
 def datetime_to_str(dtime: datetime.datetime) -> str:
     "Serialize a `datetime.datetime` to a string."
-    return dtime.strftime("%Y-%m-%dT%H:%M:%S")
+    return "{:04}-{:02}-{:02}T{:02}:{:02}:{:02}".format(
+        dtime.year,
+        dtime.month,
+        dtime.day,
+        dtime.hour,
+        dtime.minute,
+        dtime.second,
+    )
 
+@functools.lru_cache(maxsize=4096)
 def timedelta_from_str(td_s: str) -> datetime.timedelta:
     "Parse a `str` as a `datetime.timedelta` object."
 
-    if td_s.startswith("-"):
-        s_positive = td_s.lstrip("-")
-        sign_factor = -1
-    else:
-        s_positive = td_s
-        sign_factor = 1
-
-    try:
-        parts = [int(x) for x in s_positive.rsplit(":", maxsplit=2)]
-        parts.reverse()
-    except ValueError:
+    match = _TIMEDELTA_RE.match(td_s)
+    if not match:
         raise Error(f"error parsing timedelta: {td_s}")
 
-    for part in parts:
-        if part < 0:
-            raise Error(f"error parsing timedelta: {td_s}")
+    (sign, first, second, third) = match.groups()
+    if third is not None:
+        (hours, minutes, seconds) = (int(first), int(second), int(third))
+    elif second is not None:
+        (hours, minutes, seconds) = (0, int(first), int(second))
+    else:
+        (hours, minutes, seconds) = (0, 0, int(first))
 
-    get_part = lambda x: parts[x] if len(parts) > x else 0
-    return sign_factor * datetime.timedelta(
-        hours=get_part(2),
-        minutes=get_part(1),
-        seconds=get_part(0),
-    )
+    delta_t = datetime.timedelta(hours=hours, minutes=minutes, seconds=seconds)
+    return -delta_t if sign else delta_t
 
 def timedelta_components(
         delta_t: datetime.timedelta,
@@ -52,17 +73,19 @@ def timedelta_components(
         allow_negative=True
 ) -> Tuple[int, int, int, int]:
     "Get sign, hours, minutes, and seconds components of a `datetime.timedelta`."
+
+    # Integer arithmetic on the normalized days/seconds fields is exact for
+    # any magnitude, unlike the float returned by total_seconds()
+    total = delta_t.days * 86400 + delta_t.seconds
     if allow_negative:
-        seconds = abs(delta_t.total_seconds())
-        sign = 1 if delta_t.total_seconds() >= 0 else -1
+        sign = 1 if total >= 0 else -1
+        total = abs(total)
     else:
-        seconds = max(0, delta_t.total_seconds())
         sign = 1
+        total = max(0, total)
 
-    hours = int(seconds / 3600)
-    seconds = seconds - hours * 3600
-    minutes = int(seconds / 60)
-    seconds = int(seconds - minutes * 60)
+    (hours, seconds) = divmod(total, 3600)
+    (minutes, seconds) = divmod(seconds, 60)
     return (sign, hours, minutes, seconds)
 
 def timedelta_to_path_str(delta_t: datetime.timedelta) -> str:
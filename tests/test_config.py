@@ -54,6 +54,39 @@ def test_config_from_argv_job_path_invalid(path):
     with pytest.raises(Error):
         Config.from_argv(["", "--job-path", path])
 
+@pytest.mark.parametrize("argv,expected", [
+    ([""], False),
+    (["", "--force"], True),
+])
+def test_config_from_argv_force(argv, expected):
+    "Forced clip rewriting can be enabled."
+    config = Config.from_argv(argv)
+    assert config.force == expected
+
+@pytest.mark.parametrize("opt", ["--jobs"])
+def test_config_from_argv_jobs(opt):
+    "The default number of parallel jobs can be changed."
+    config = Config.from_argv(["", opt, "4"])
+    assert config.jobs == 4
+
+@pytest.mark.parametrize("opt", ["--ffmpeg-threads"])
+def test_config_from_argv_ffmpeg_threads(opt):
+    "The default per-ffmpeg thread count can be changed."
+    config = Config.from_argv(["", opt, "4"])
+    assert config.ffmpeg_threads == 4
+
+@pytest.mark.parametrize("threads", ["", "0", "-1", "x"])
+def test_config_from_argv_ffmpeg_threads_invalid(threads):
+    "Invalid thread counts are rejected."
+    with pytest.raises(Error):
+        Config.from_argv(["", "--ffmpeg-threads", threads])
+
+@pytest.mark.parametrize("jobs", ["", "0", "-1", "x"])
+def test_config_from_argv_jobs_invalid(jobs):
+    "Invalid job counts are rejected."
+    with pytest.raises(Error):
+        Config.from_argv(["", "--jobs", jobs])
+
 @pytest.mark.parametrize("optargs,expected", [
     # Simple key=value arguments work
     ((" =_",), Replace.from_dict({" ": "_"})),
@@ -116,6 +149,7 @@ def test_config_from_argv_filename_replace_invalid(optarg):
 
 @pytest.mark.parametrize("subcommand_str,expected", [
     ("clip", Subcommand.CLIP),
+    ("convert", Subcommand.CONVERT),
     ("help", Subcommand.HELP),
     ("run", Subcommand.RUN),
 ])
@@ -175,8 +209,10 @@ def test_config_from_argv_video_filename_format_invalid(fmt):
     # Valid values override defaults
     (
         {
+            "ffmpeg-threads": 3,
             "filename-replace": {" ": "_"},
             "job-path": "/dev/null",
+            "jobs": 4,
             "output-dir": "/dev/null",
             "output-ext": "rm",
             "video-dir": "/dev/null",
@@ -184,7 +220,9 @@ def test_config_from_argv_video_filename_format_invalid(fmt):
             "video-filename-format": "%s",
         },
         Prefs(
+            ffmpeg_threads=3,
             job_path=Path("/dev/null"),
+            jobs=4,
             filename_replace=Replace.from_dict({" ": "_"}),
             output_dir=Path("/dev/null"),
             output_ext="rm",
@@ -9,6 +9,19 @@ from mvcs.config import Config, Replace
 from mvcs.error import Error
 from mvcs.job import Clip, Job, Video
 
+# Shared configs, so parametrization builds each once at collection instead
+# of once per test case
+DEFAULT_CONFIG = Config.default()
+UNDERSCORE_MP4_CONFIG = DEFAULT_CONFIG._replace(
+    filename_replace=Replace.from_dict({" ": "_"}),
+    output_ext="mp4",
+)
+UNDERSCORE_FORMAT_CONFIG = DEFAULT_CONFIG._replace(
+    filename_replace=Replace.from_dict({" ": "_"}),
+    video_filename_format="%Y %m %d %H %M %S",
+    video_ext="mp4",
+)
+
 @pytest.mark.parametrize("data,expected", [
     # Times can be specified in any parsable format
     (
@@ -76,6 +89,8 @@ def test_clip_from_dict(data, expected):
     # Title cannot be empty or unspecified
     {"time": "1 - 10", "title": ""},
     {"time": "1 - 10"},
+    # Unknown keys are rejected
+    {"time": "1 - 10", "title": "test", "not-a-real-key": "test"},
 ])
 def test_clip_from_dict_invalid(data):
     "Deserializing an invalid clip dict results in an error."
@@ -87,7 +102,7 @@ def test_clip_from_dict_invalid(data):
     # Clip start time is relative to video time with epoch 0
     (
         Clip.from_dict({"time": "1-2", "title": "title"}),
-        Config.default(),
+        DEFAULT_CONFIG,
         datetime.datetime(1970, 1, 1),
         datetime.timedelta(),
         "test",
@@ -96,7 +111,7 @@ def test_clip_from_dict_invalid(data):
     # Clip start time and video time are adjusted with positive epoch
     (
         Clip.from_dict({"time": "1-2", "title": "title"}),
-        Config.default(),
+        DEFAULT_CONFIG,
         datetime.datetime(1970, 1, 1),
         datetime.timedelta(seconds=1),
         "test",
@@ -105,7 +120,7 @@ def test_clip_from_dict_invalid(data):
     # Clip start time and video time are adjusted with negative epoch
     (
         Clip.from_dict({"time": "1-2", "title": "title"}),
-        Config.default(),
+        DEFAULT_CONFIG,
         datetime.datetime(1970, 1, 1),
         -1 * datetime.timedelta(seconds=1),
         "test",
@@ -114,7 +129,7 @@ def test_clip_from_dict_invalid(data):
     # Clip start time saturates at 0 when it is before the epoch
     (
         Clip.from_dict({"time": "1-2", "title": "title"}),
-        Config.default(),
+        DEFAULT_CONFIG,
         datetime.datetime(1970, 1, 1),
         datetime.timedelta(seconds=3),
         "test",
@@ -123,7 +138,7 @@ def test_clip_from_dict_invalid(data):
     # Problematic characters are munged and lowercased
     (
         Clip.from_dict({"time": "0-1", "title": "THIS? is/bad"}),
-        Config.default(),
+        DEFAULT_CONFIG,
         datetime.datetime(1970, 1, 1),
         datetime.timedelta(),
         "NOT/VERY|GOOD<AT>\\ALL:*\"HERE?",
@@ -132,10 +147,7 @@ def test_clip_from_dict_invalid(data):
     # The output filename respects the config
     (
         Clip.from_dict({"time": "1-2", "title": "title"}),
-        Config.default()._replace(
-            filename_replace=Replace.from_dict({" ": "_"}),
-            output_ext="mp4",
-        ),
+        UNDERSCORE_MP4_CONFIG,
         datetime.datetime(1970, 1, 1),
         datetime.timedelta(),
         "test",
@@ -144,7 +156,8 @@ def test_clip_from_dict_invalid(data):
 ])
 def test_clip_path_str(clip, config, date, epoch, title, expected):
     "Getting the filename for a clip works as expected."
-    path = clip.path_str(config, date, epoch, title)
+    date_str = (date + epoch).strftime("%Y-%m-%d %H:%M:%S")
+    path = clip.path_str(config, date_str, epoch, title)
     assert path == expected
 
 @pytest.mark.parametrize("data,expected", [
@@ -230,6 +243,12 @@ def test_video_from_dict(data, expected):
     # Date and title must be defined
     {"title": "test"},
     {"date": "1970-01-01T00:00:00"},
+    # Unknown keys are rejected
+    {
+        "date": "1970-01-01T00:00:00",
+        "title": "test",
+        "not-a-real-key": "test",
+    },
 ])
 def test_video_from_dict_invalid(data):
     "Deserializing an invalid video dict results in an error."
@@ -239,17 +258,13 @@ def test_video_from_dict_invalid(data):
 @pytest.mark.parametrize("config,path,expected", [
     # Default config works as expected
     (
-        Config.default(),
+        DEFAULT_CONFIG,
         Path("/foo/bar/1970-01-01 00-00-00.mkv"),
         Video.from_dict({"date": "1970-01-01T00:00:00", "title": "video"}),
     ),
     # Filename handling config is respected
     (
-        Config.default()._replace(
-            filename_replace=Replace.from_dict({" ": "_"}),
-            video_filename_format="%Y %m %d %H %M %S",
-            video_ext="mp4",
-        ),
+        UNDERSCORE_FORMAT_CONFIG,
         Path("/foo/bar/1970_01_01_02_03_04.mp4"),
         Video.from_dict({"date": "1970-01-01T02:03:04", "title": "video"}),
     ),
@@ -261,9 +276,9 @@ def test_video_from_path(config, path, expected):
 
 @pytest.mark.parametrize("config,path", [
     # Files that don't match the video filename format are rejected
-    (Config.default(), Path("/foo/bar/baz.mkv")),
+    (DEFAULT_CONFIG, Path("/foo/bar/baz.mkv")),
     # Files with the wrong extension are rejected
-    (Config.default(), Path("/foo/bar/1970-01-01 00-00-00.mp4")),
+    (DEFAULT_CONFIG, Path("/foo/bar/1970-01-01 00-00-00.mp4")),
 ])
 def test_video_from_path_invalid(config, path):
     "Invalid paths raise an error."
@@ -298,17 +313,57 @@ def test_video_from_path_invalid(config, path):
 ])
 def test_job_from_dict(data, expected):
     "Jobs are deserialized from dicts correctly."
-    job = Job.from_dict(Config.default(), data)
+    job = Job.from_dict(DEFAULT_CONFIG, data)
     assert job == expected
 
+def test_job_validate(tmp_path):
+    "Validation passes for a job whose inputs and outputs check out."
+    (tmp_path / "1970-01-01 00-00-00.mkv").touch()
+    job = Job.from_dict(DEFAULT_CONFIG, {
+        "output-dir": str(tmp_path),
+        "video-dir": str(tmp_path),
+        "videos": [{
+            "date": "1970-01-01T00:00:00",
+            "title": "test",
+            "clips": [{"time": "0-1", "title": "clip"}],
+        }],
+    })
+    job.validate(DEFAULT_CONFIG)
+
+@pytest.mark.parametrize("videos", [
+    # Source video file does not exist
+    [{"date": "1970-01-02T00:00:00", "title": "test"}],
+    # Two clips resolve to the same output filename
+    [{
+        "date": "1970-01-01T00:00:00",
+        "title": "test",
+        "clips": [
+            {"time": "0-1", "title": "same"},
+            {"time": "0-2", "title": "same"},
+        ],
+    }],
+])
+def test_job_validate_invalid(tmp_path, videos):
+    "Validation rejects broken jobs before any clip is written."
+    (tmp_path / "1970-01-01 00-00-00.mkv").touch()
+    job = Job.from_dict(DEFAULT_CONFIG, {
+        "output-dir": str(tmp_path),
+        "video-dir": str(tmp_path),
+        "videos": videos,
+    })
+    with pytest.raises(Error):
+        job.validate(DEFAULT_CONFIG)
+
 @pytest.mark.parametrize("data", [
     # videos must be a list of dicts
     {"videos": ""},
     {"videos": {}},
     {"videos": [""]},
     {"videos": [[]]},
+    # Unknown keys are rejected
+    {"not-a-real-key": "test"},
 ])
 def test_job_from_dict_invalid(data):
     "Deserializing an invalid job dict results in an error."
     with pytest.raises(Error):
-        Job.from_dict(Config.default(), data)
+        Job.from_dict(DEFAULT_CONFIG, data)